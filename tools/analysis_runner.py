@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import os
 import re
+import signal
 import subprocess
 import sys
 from pathlib import Path
@@ -23,29 +24,76 @@ ALLOWED_IMPORT_PATTERN = re.compile(
     r"^\s*(?:from\s+(\w+)(?:\.\w+)*\s+import|import\s+(\w+)(?:\.\w+)*)"
 )
 FORBIDDEN = {"subprocess", "os.system", "eval", "exec", "__import__"}  # базовая фильтрация; open разрешён для записи в OUTPUT_DIR
+_FORBIDDEN_RE = re.compile("|".join(re.escape(bad) for bad in sorted(FORBIDDEN)))
+# Сколько символов хвоста run.log возвращать в поле error
+ERROR_TAIL_CHARS = 2000
 
 
 def _check_script_imports(script_content: str) -> str | None:
     """Проверяет, что в скрипте нет явно запрещённых конструкций. Возвращает None или сообщение об ошибке."""
-    lines = script_content.splitlines()
-    for line in lines:
-        stripped = line.strip()
+    for line in script_content.splitlines():
+        stripped = line.lstrip()
         if stripped.startswith("#"):
             continue
-        for bad in FORBIDDEN:
-            if bad in stripped and not stripped.startswith("#"):
-                return f"Запрещённая конструкция в скрипте: {bad}"
+        m = _FORBIDDEN_RE.search(stripped)
+        if m:
+            return f"Запрещённая конструкция в скрипте: {m.group(0)}"
     return None
 
 
+def _read_log_tail(log_path: Path, max_chars: int = ERROR_TAIL_CHARS) -> str:
+    """Читает только хвост лога: скрипт может написать гигабайты, а в ответ нужен конец."""
+    # UTF-8 — до 4 байт на символ; читаем с запасом и обрезаем уже после декодирования
+    max_bytes = max_chars * 4
+    with open(log_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        data = f.read()
+    text = data.decode("utf-8", errors="replace")
+    return text[-max_chars:] if len(text) > max_chars else text
+
+
+def _stop_process_group(proc: subprocess.Popen, grace_sec: float) -> None:
+    """
+    Останавливает скрипт и всех его потомков: SIGTERM группе процессов,
+    через grace_sec — SIGKILL оставшимся. Даёт скрипту дописать лог и файлы результатов.
+    """
+    if os.name != "posix":
+        proc.terminate()
+        try:
+            proc.wait(timeout=grace_sec)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait(timeout=5)
+        return
+
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    try:
+        proc.wait(timeout=grace_sec)
+    except subprocess.TimeoutExpired:
+        pass
+    # Добиваем и тех потомков, что пережили SIGTERM после выхода самого скрипта
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    proc.wait(timeout=5)
+
+
 def run_analysis_script(
     scenario_id: str,
     script_content: str,
     timeout_sec: int = 120,
+    grace_sec: float = 1.0,
 ) -> dict:
     """
     Сохраняет script_content в ai_experiments/<scenario_id>/analysis.py,
     запускает его с таймаутом, пишет лог в run.log.
+    По таймауту скрипт получает SIGTERM и через grace_sec — SIGKILL (вместе с потомками).
     Возвращает dict: success, message, log_path, result_paths, error.
     """
     err = _check_script_imports(script_content)
@@ -70,6 +118,7 @@ def run_analysis_script(
     script_path = scenario_dir / "analysis.py"
     script_path.write_text(script_content, encoding="utf-8")
     log_path = scenario_dir / "run.log"
+    rel_log_path = f"ai_experiments/{scenario_id}/run.log"
 
     env = os.environ.copy()
     env["OUTPUT_DIR"] = str(scenario_dir)
@@ -77,34 +126,40 @@ def run_analysis_script(
     env["PYTHONUNBUFFERED"] = "1"
 
     try:
-        with open(log_path, "w", encoding="utf-8") as log_file:
+        # Вывод скрипта пишется в лог как есть (байты); декодируется один раз при чтении хвоста
+        with open(log_path, "wb") as log_file:
             proc = subprocess.Popen(
                 [sys.executable, str(script_path)],
                 cwd=str(scenario_dir),
                 env=env,
                 stdout=log_file,
                 stderr=subprocess.STDOUT,
-                text=True,
+                # Своя группа процессов, чтобы по таймауту остановить и порождённые скриптом процессы
+                start_new_session=os.name == "posix",
             )
             try:
                 proc.wait(timeout=timeout_sec)
             except subprocess.TimeoutExpired:
-                proc.kill()
-                proc.wait(timeout=5)
+                _stop_process_group(proc, grace_sec)
                 with open(log_path, "a", encoding="utf-8") as f:
                     f.write(f"\n[Превышен таймаут {timeout_sec} с]\n")
                 return {
                     "success": False,
                     "message": f"Таймаут {timeout_sec} с.",
-                    "log_path": f"ai_experiments/{scenario_id}/run.log",
+                    "log_path": rel_log_path,
                     "result_paths": [],
                     "error": "Timeout",
                 }
+            except BaseException:
+                # Скрипт в своей сессии и не получает Ctrl-C терминала: при прерывании
+                # или падении агента останавливаем его группу сами, чтобы не оставить сирот
+                _stop_process_group(proc, grace_sec)
+                raise
     except Exception as e:
         return {
             "success": False,
             "message": str(e),
-            "log_path": f"ai_experiments/{scenario_id}/run.log",
+            "log_path": rel_log_path,
             "result_paths": [],
             "error": str(e),
         }
@@ -118,19 +173,18 @@ def run_analysis_script(
                     result_paths.append(f"ai_experiments/{scenario_id}/{sub}/{f.name}")
 
     if proc.returncode != 0:
-        log_text = log_path.read_text(encoding="utf-8", errors="replace")
         return {
             "success": False,
             "message": f"Скрипт завершился с кодом {proc.returncode}.",
-            "log_path": f"ai_experiments/{scenario_id}/run.log",
+            "log_path": rel_log_path,
             "result_paths": result_paths,
-            "error": log_text[-2000:] if len(log_text) > 2000 else log_text,
+            "error": _read_log_tail(log_path),
         }
 
     return {
         "success": True,
         "message": "Выполнено успешно.",
-        "log_path": f"ai_experiments/{scenario_id}/run.log",
+        "log_path": rel_log_path,
         "result_paths": result_paths,
         "error": None,
     }
@@ -5,6 +5,7 @@
 """
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -13,6 +14,11 @@ from tqdm import tqdm
 from pdf2md import pdf_to_md
 
 
+def _convert_one(pdf_path: Path, output_path: Path, write_images: bool) -> None:
+    """Конвертирует один PDF в процессе пула; текст Markdown не возвращается, чтобы не гонять его через IPC."""
+    pdf_to_md(pdf_path, output_path=output_path, write_images=write_images)
+
+
 def main() -> None:
     load_dotenv()
 
@@ -36,6 +42,12 @@ def main() -> None:
         action="store_true",
         help="Извлекать изображения в отдельные файлы",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Число параллельных процессов конвертации, не меньше 1 (по умолчанию 1 — последовательно)",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -47,6 +59,8 @@ def main() -> None:
         help="Пропускать PDF, для которых уже есть .md в папке назначения",
     )
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error(f"--workers должно быть не меньше 1: {args.workers}")
 
     src_root = args.src or Path(os.environ.get("SRC_DOCUMENTS_PATH", "")).expanduser().resolve()
     dst_root = args.dst or Path(os.environ.get("MD_DOCUMENTS_PATH", "")).expanduser().resolve()
@@ -81,20 +95,30 @@ def main() -> None:
 
     dst_root.mkdir(parents=True, exist_ok=True)
     failed = []
+    jobs = [(p, dst_root / p.relative_to(src_root).with_suffix(".md")) for p in pdf_files]
 
-    for pdf_path in tqdm(pdf_files, desc="Конвертация"):
-        rel = pdf_path.relative_to(src_root)
-        out_path = dst_root / rel.with_suffix(".md")
-        if args.skip_existing and out_path.exists():
-            continue
-        try:
-            pdf_to_md(
-                pdf_path,
-                output_path=out_path,
-                write_images=args.images,
-            )
-        except Exception as e:
-            failed.append((pdf_path, e))
+    if args.workers > 1:
+        # PDF обрабатываются независимо — раздаём файлы по процессам (CPU-bound: разбор, таблицы, OCR)
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(_convert_one, pdf_path, out_path, args.images): pdf_path
+                for pdf_path, out_path in jobs
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Конвертация"):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append((futures[future], e))
+    else:
+        for pdf_path, out_path in tqdm(jobs, desc="Конвертация"):
+            try:
+                pdf_to_md(
+                    pdf_path,
+                    output_path=out_path,
+                    write_images=args.images,
+                )
+            except Exception as e:
+                failed.append((pdf_path, e))
 
     if failed:
         print(f"\nОшибки ({len(failed)}):")
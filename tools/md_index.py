@@ -90,10 +90,16 @@ def main() -> None:
     manifest = build_manifest(root, max_headings=args.max_headings)
 
     args.output.parent.mkdir(parents=True, exist_ok=True)
-    args.output.write_text(
-        json.dumps(manifest, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    # json.dump пишет по частям, без промежуточной строки со всем манифестом;
+    # временный файл подменяет манифест целиком, поиск не увидит недописанный JSON
+    tmp_path = args.output.with_name(args.output.name + ".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, args.output)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
     print(f"Готово: {args.output} ({manifest['file_count']} файлов)")
 
 
@@ -8,14 +8,17 @@ from __future__ import annotations
 
 import argparse
 import json
-import math
 import os
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 from dotenv import load_dotenv
 from tqdm import tqdm
 
+# Сколько строк индекса оценивается за одну матричную операцию в search_semantic
+SCORE_BATCH_ROWS = 1024
+
 
 def _create_ollama_embeddings(model_name: str):
     try:
@@ -93,13 +96,28 @@ def _split_chunks(text: str, chunk_size: int, overlap: int) -> list[str]:
     return chunks
 
 
-def _cosine_similarity(a: list[float], b: list[float]) -> float:
-    num = sum(x * y for x, y in zip(a, b))
-    den_a = math.sqrt(sum(x * x for x in a))
-    den_b = math.sqrt(sum(y * y for y in b))
-    if den_a == 0.0 or den_b == 0.0:
-        return 0.0
-    return num / (den_a * den_b)
+def _score_batch(
+    query_vec: np.ndarray,
+    query_norm: float,
+    embeddings: list[list[float]],
+    items: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Косинусная близость запроса к пачке строк индекса одной матричной операцией."""
+    try:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+    except ValueError:
+        matrix = None
+    if matrix is None or matrix.ndim != 2 or matrix.shape[1] != query_vec.shape[0]:
+        raise RuntimeError(
+            "Размерность эмбеддингов семантического индекса не совпадает с моделью запроса. "
+            "Перестройте индекс: python tools/md_search.py semantic-index"
+        )
+    dots = matrix @ query_vec
+    den = np.linalg.norm(matrix, axis=1) * query_norm
+    scores = np.divide(dots, den, out=np.zeros_like(dots), where=den != 0)
+    for item, score in zip(items, scores.tolist()):
+        item["score"] = score
+    return items
 
 
 def build_semantic_index(
@@ -165,24 +183,33 @@ def search_semantic(
         return []
 
     embedding_model = _create_ollama_embeddings(model_name)
-    query_vec = embedding_model.embed_query(query)
+    query_vec = np.asarray(embedding_model.embed_query(query), dtype=np.float32)
+    query_norm = float(np.linalg.norm(query_vec))
 
+    # Векторы копятся пачкой в матрицу (N, D) и оцениваются разом, а не построчно в Python
     scored: list[dict[str, Any]] = []
+    batch_items: list[dict[str, Any]] = []
+    batch_embeddings: list[list[float]] = []
     with semantic_index_path.open("r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             row = json.loads(line)
-            score = _cosine_similarity(query_vec, row["embedding"])
-            scored.append(
+            batch_embeddings.append(row["embedding"])
+            batch_items.append(
                 {
-                    "score": score,
+                    "score": 0.0,
                     "path": row["path"],
                     "chunk_id": row["chunk_id"],
                     "snippet": row["text"][:280].replace("\n", " "),
                 }
             )
+            if len(batch_embeddings) >= SCORE_BATCH_ROWS:
+                scored.extend(_score_batch(query_vec, query_norm, batch_embeddings, batch_items))
+                batch_items, batch_embeddings = [], []
+    if batch_embeddings:
+        scored.extend(_score_batch(query_vec, query_norm, batch_embeddings, batch_items))
 
     scored.sort(key=lambda x: x["score"], reverse=True)
     return scored[:max_results]
@@ -6,8 +6,6 @@
 import argparse
 from pathlib import Path
 
-import pymupdf4llm
-
 
 def pdf_to_md(
     input_path: str | Path,
@@ -29,6 +27,15 @@ def pdf_to_md(
     if not input_path.exists():
         raise FileNotFoundError(f"Файл не найден: {input_path}")
 
+    # Импорт здесь: pymupdf4llm тянет pymupdf и тяжёлые зависимости,
+    # а convert_docs --dry-run/--help конвертацию не запускают
+    try:
+        import pymupdf4llm
+    except ModuleNotFoundError as exc:
+        raise RuntimeError(
+            "Для конвертации PDF установите зависимость: pip install pymupdf4llm"
+        ) from exc
+
     # pymupdf4llm принимает 0-based индексы
     pages_0based = [p - 1 for p in pages] if pages else None
 